@@ -1,4 +1,9 @@
 import os
+import mmap
+
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 
 __here__ = os.path.dirname(__file__)
 
@@ -21,8 +26,126 @@ def n_measurements_increasing(measurements):
     return [is_increasing(*p) for p in pairs].count(True)
 
 
+def stream_measurements(fp, chunk_size=1 << 16):
+    '''Lazily generates measurements from a file object, reading it in chunks.
+
+    Only the partial line at the end of a chunk is carried over to the next one.
+    '''
+    remainder = ''
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        lines = (remainder + chunk).split('\n')
+        remainder = lines.pop()
+        yield from (int(x) for x in lines if x.strip())
+    if remainder.strip():
+        yield int(remainder)
+
+
+def n_increasing_streaming(measurements, window=3):
+    '''Counts raw and windowed increases in a single pass over measurements.
+
+    Comparing the sums of two consecutive windows of size `window` is the same
+    as comparing `a[i]` with `a[i + window]`, since every other term is shared.
+    Hence we only need to remember the last `window` measurements.
+
+    >>> n_increasing_streaming(iter([1, 2, 3, 1]), 2)
+    (2, 1)
+    '''
+    recent = deque(maxlen=window)
+    n_raw, n_window = 0, 0
+
+    for value in measurements:
+        if recent and recent[-1] < value:
+            n_raw += 1
+        if len(recent) == window and recent[0] < value:
+            n_window += 1
+        recent.append(value)
+
+    return n_raw, n_window
+
+
+def chunk_bounds(buffer, chunk_size):
+    '''Splits a buffer into (start, end) ranges of about `chunk_size` bytes.
+
+    Boundaries are moved forward to the next newline so that no measurement is
+    cut in half.
+    '''
+    size = len(buffer)
+    start = 0
+
+    while start < size:
+        end = buffer.find(b'\n', min(start + chunk_size, size))
+        end = size if end == -1 else end + 1
+        yield start, end
+        start = end
+
+
+def count_chunk(path, start, end, window):
+    '''Counts increases within a chunk of the file.
+
+    Measurements are parsed lazily and only the last `window` of them are
+    kept around. Also returns the first and the last `window` measurements of
+    the chunk, so that pairs straddling the chunk edges can be fixed up
+    afterwards.
+    '''
+    with open(path, 'rb') as fp:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            values = map(int, mm[start:end].split())
+
+            head = list(islice(values, window))
+            recent = deque(head, maxlen=window)
+            count = 0
+            for value in values:
+                if recent[0] < value:
+                    count += 1
+                recent.append(value)
+
+    return count, head, list(recent)
+
+
+def n_increasing_parallel(path, window=1, processes=None, chunk_size=1 << 20):
+    '''Counts increasing window sums of a memory-mapped file using a process pool.
+
+    The file is split into chunks of about `chunk_size` bytes, many more than
+    there are workers, so that a worker only ever holds one small chunk. Every
+    chunk counts the increases within itself. The pairs whose elements are
+    `window` apart across a chunk edge are then counted sequentially, carrying
+    over the last `window` measurements seen so far.
+    '''
+    with open(path, 'rb') as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            bounds = list(chunk_bounds(mm, chunk_size))
+
+    with ProcessPoolExecutor(processes) as pool:
+        results = pool.map(
+            count_chunk,
+            [path] * len(bounds),
+            *zip(*bounds),
+            [window] * len(bounds),
+        )
+
+        total = 0
+        carry = []
+        for count, head, tail in results:
+            total += count
+            # head[j] is compared with the value `window` places before it,
+            # which lives in the carry when j < window.
+            for j, value in enumerate(head):
+                i = len(carry) + j - window
+                if i >= 0 and carry[i] < value:
+                    total += 1
+            carry = (carry + tail)[-window:]
+
+    return total
+
+
 if __name__ == '__main__':
     assert n_measurements_increasing(TEST_DATA) == 7
+    assert n_increasing_streaming(iter(TEST_DATA), 3) == (7, 5)
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         lines = fp.read().split()
@@ -36,5 +159,12 @@ if __name__ == '__main__':
 
     answer_2 = n_measurements_increasing(measurements_2)
 
+    with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
+        assert n_increasing_streaming(stream_measurements(fp), 3) == (answer_1, answer_2)
+
+    input_path = os.path.join(__here__, 'input.txt')
+    assert n_increasing_parallel(input_path, 1) == answer_1
+    assert n_increasing_parallel(input_path, 3) == answer_2
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
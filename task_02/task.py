@@ -1,5 +1,12 @@
 import os
 
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import accumulate, compress
+from operator import mul
+
 __here__ = os.path.dirname(__file__)
 
 TEST_DATA = [
@@ -11,6 +18,15 @@ TEST_DATA = [
     'forward 2',
 ]
 
+OPCODES = {'forward': 0, 'down': 1, 'up': 2}
+# Translate opcodes into whether the command moves forward, and into how it
+# changes aim. The sign is read back as a signed byte, so 0xff is -1.
+IS_FORWARD = bytes.maketrans(bytes([0, 1, 2]), bytes([1, 0, 0]))
+AIM_SIGN = bytes.maketrans(bytes([0, 1, 2]), bytes([0, 1, 0xff]))
+
+# Net effect of a run of commands, starting from zero aim.
+Summary = namedtuple('Summary', ['hpos', 'aim', 'depth'])
+
 def parse_command(cmd):
     verb, amount_s = cmd.split(' ')
     return verb, int(amount_s)
@@ -39,16 +55,133 @@ def calculate_2(cmds):
             aim -= amount
     return hpos * depth
 
+class SubmarineTracker:
+    '''Keeps track of the submarine position as commands are appended.
+
+    Both parts are tracked at once: the depth from the first part is the same
+    as the aim from the second part.
+    '''
+    def __init__(self):
+        self.hpos = 0
+        self.aim = 0
+        self.depth = 0
+
+    def append(self, cmd):
+        cmd, amount = parse_command(cmd.strip())
+        if cmd == 'forward':
+            self.hpos += amount
+            self.depth += (self.aim * amount)
+        if cmd == 'down':
+            self.aim += amount
+        if cmd == 'up':
+            self.aim -= amount
+
+    def extend(self, cmds):
+        '''Appends every command from an iterable, such as an open log file.'''
+        for cmd in cmds:
+            if cmd.strip():
+                self.append(cmd)
+
+    @property
+    def answer_1(self):
+        return self.hpos * self.aim
+
+    @property
+    def answer_2(self):
+        return self.hpos * self.depth
+
+def compile_commands(data):
+    '''Parses command text into compact opcode and amount arrays in bulk.
+
+    >>> compile_commands('forward 5 up 3')
+    (array('B', [0, 2]), array('q', [5, 3]))
+    '''
+    tokens = data.split()
+    opcodes = array('B', map(OPCODES.__getitem__, tokens[0::2]))
+    amounts = array('q', map(int, tokens[1::2]))
+    return opcodes, amounts
+
+def summarise_compiled(opcodes, amounts):
+    '''Summarises compiled commands without branching per command.
+
+    The aim is the prefix sum of the up/down amounts, so the depth in the second
+    part is the sum of aim * forward amounts. In the first part the depth is
+    simply the final aim. Masks come from translating the opcode bytes, and
+    everything runs through `compress`, `map` and `accumulate` without building
+    any intermediate lists, which keeps the per-command work out of the
+    interpreter loop.
+    '''
+    is_forward = opcodes.tobytes().translate(IS_FORWARD)
+    signs = array('b', opcodes.tobytes().translate(AIM_SIGN))
+
+    hpos = sum(compress(amounts, is_forward))
+    aim = sum(map(mul, amounts, signs))
+    aims = accumulate(map(mul, amounts, signs))
+    depth = sum(map(mul, compress(aims, is_forward), compress(amounts, is_forward)))
+
+    return Summary(hpos, aim, depth)
+
+def execute_compiled(opcodes, amounts):
+    '''Computes both answers from compiled commands.'''
+    hpos, aim, depth = summarise_compiled(opcodes, amounts)
+    return hpos * aim, hpos * depth
+
+def summarise_chunk(data):
+    return summarise_compiled(*compile_commands(data))
+
+def merge_summaries(lhs, rhs):
+    '''Combines summaries of two consecutive runs of commands.
+
+    The right run started with zero aim, but actually starts with `lhs.aim`,
+    so each of its forward moves goes deeper by that much. The merge is
+    associative, hence chunks can be summarised independently.
+
+    >>> merge_summaries(Summary(5, 5, 0), Summary(8, -3, 0))
+    Summary(hpos=13, aim=2, depth=40)
+    '''
+    return Summary(
+        lhs.hpos + rhs.hpos,
+        lhs.aim + rhs.aim,
+        lhs.depth + rhs.depth + lhs.aim * rhs.hpos,
+    )
+
+def calculate_parallel(cmds, processes=None, chunk_size=1 << 16):
+    '''Computes both answers by summarising chunks of commands in a process pool.'''
+    chunks = [
+        '\n'.join(cmds[i:i + chunk_size])
+        for i in range(0, len(cmds), chunk_size)
+    ]
+    with ProcessPoolExecutor(processes) as pool:
+        summaries = pool.map(summarise_chunk, chunks)
+        hpos, aim, depth = reduce(merge_summaries, summaries, Summary(0, 0, 0))
+    return hpos * aim, hpos * depth
 
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 150
     assert calculate_2(TEST_DATA) == 900
+    assert execute_compiled(*compile_commands('\n'.join(TEST_DATA))) == (150, 900)
+    assert calculate_parallel(TEST_DATA, chunk_size=2) == (150, 900)
+
+    tracker = SubmarineTracker()
+    tracker.extend(TEST_DATA[:3])
+    assert (tracker.answer_1, tracker.answer_2) == (65, 520)
+    tracker.extend(TEST_DATA[3:])
+    assert (tracker.answer_1, tracker.answer_2) == (150, 900)
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
-        commands = fp.read().split('\n')
+        data = fp.read()
+        commands = data.split('\n')
 
     answer_1 = calculate_1(commands)
     answer_2 = calculate_2(commands)
 
+    assert execute_compiled(*compile_commands(data)) == (answer_1, answer_2)
+    assert calculate_parallel(commands) == (answer_1, answer_2)
+
+    tracker = SubmarineTracker()
+    with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
+        tracker.extend(fp)
+    assert (tracker.answer_1, tracker.answer_2) == (answer_1, answer_2)
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
@@ -1,5 +1,10 @@
 import os
 
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import repeat
+
 __here__ = os.path.dirname(__file__)
 
 TEST_DATA = [
@@ -76,9 +81,186 @@ def calculate_2(data):
     return int(ox_gen_rating, base=2) * int(co2_scrub_rating, base=2)
 
 
+def decode_diagnostics(data):
+    '''Converts the diagnostic lines into integers, returned with the width.'''
+    width = len(data[0])
+    return list(map(int, filter(None, data), repeat(2))), width
+
+
+# Up to this width, rows are counted by value rather than bit by bit.
+HISTOGRAM_MAX_WIDTH = 16
+
+
+def column_popcounts(values, width):
+    '''Counts the rows and the set bits in each column of the packed diagnostics.
+
+    Narrow reports have few distinct rows, so we take a histogram of the values
+    and only split the distinct ones into bits. Wider rows are summed with a
+    bit-sliced counter instead: `planes[i]` holds bit `i` of the running count
+    of every column, so one addition updates all columns at once regardless of
+    how wide the rows are. Columns are returned left to right.
+
+    >>> column_popcounts([0b110, 0b011, 0b010], 3)
+    ([1, 3, 1], 3)
+    '''
+    if width <= HISTOGRAM_MAX_WIDTH:
+        histogram = Counter(values)
+        counts = [0] * width
+        for value, n in histogram.items():
+            for pos in range(width):
+                if (value >> pos) & 1:
+                    counts[pos] += n
+        return counts[::-1], sum(histogram.values())
+
+    planes = []
+    n_rows = 0
+
+    for value in values:
+        n_rows += 1
+        carry, i = value, 0
+        while carry:
+            if i == len(planes):
+                planes.append(0)
+            planes[i], carry = planes[i] ^ carry, planes[i] & carry
+            i += 1
+
+    counts = [
+        sum(((plane >> pos) & 1) << i for i, plane in enumerate(planes))
+        for pos in reversed(range(width))
+    ]
+    return counts, n_rows
+
+
+def power_consumption(counts, n_rows, width):
+    '''Returns gamma * epsilon given the number of set bits in each column.'''
+    gamma = 0
+    for n_1 in counts:
+        # Ties favor `1`, same as in `common_bits`.
+        gamma = (gamma << 1) | (2 * n_1 >= n_rows)
+    epsilon = ~gamma & ((1 << width) - 1)
+
+    return gamma * epsilon
+
+
+def calculate_1_packed(data):
+    values, width = decode_diagnostics(data)
+    counts, n_rows = column_popcounts(values, width)
+    return power_consumption(counts, n_rows, width)
+
+
+def find_rating(values, width, most_common):
+    '''Finds a rating by bisecting a sorted array of diagnostics.
+
+    Candidates always form a contiguous range [lo, hi) of the sorted values
+    sharing the same leading bits. Within that range the ones with the current
+    bit unset come before those with it set, so a single bisection splits them.
+
+    >>> find_rating(sorted([0b100, 0b110, 0b011]), 3, most_common=False)
+    3
+    '''
+    lo, hi = 0, len(values)
+
+    for pos in reversed(range(width)):
+        if hi - lo == 1:
+            break
+
+        bit = 1 << pos
+        prefix = (values[lo] >> (pos + 1)) << (pos + 1)
+        split = bisect_left(values, prefix | bit, lo, hi)
+
+        n_0, n_1 = split - lo, hi - split
+        keep_ones = n_1 >= n_0 if most_common else n_1 < n_0
+
+        if keep_ones and n_1:
+            lo = split
+        elif n_0:
+            hi = split
+        else:
+            lo = split
+
+    return values[lo]
+
+
+def calculate_2_sorted(data):
+    values, width = decode_diagnostics(data)
+    values.sort()
+
+    ox_gen_rating = find_rating(values, width, most_common=True)
+    co2_scrub_rating = find_rating(values, width, most_common=False)
+
+    return ox_gen_rating * co2_scrub_rating
+
+
+def stream_diagnostics(fp):
+    '''Generates the diagnostics from a file object one line at a time.
+
+    Yields the width of the report first, followed by the integer values.
+    '''
+    lines = filter(None, map(str.strip, fp))
+
+    first = next(lines)
+    yield len(first)
+    yield int(first, base=2)
+
+    yield from map(int, lines, repeat(2))
+
+
+def calculate_1_streaming(fp):
+    '''Computes the power consumption keeping only the column counters.'''
+    decoder = stream_diagnostics(fp)
+    width = next(decoder)
+    counts, n_rows = column_popcounts(decoder, width)
+    return power_consumption(counts, n_rows, width)
+
+
+def filter_rating(values, width, most_common):
+    '''Finds a rating by repeatedly filtering a packed array of diagnostics.
+
+    Works on an unsorted array so that no list of Python ints is ever built.
+    '''
+    for pos in reversed(range(width)):
+        if len(values) == 1:
+            break
+
+        n_1 = sum((value >> pos) & 1 for value in values)
+        n_0 = len(values) - n_1
+        keep_ones = n_1 >= n_0 if most_common else n_1 < n_0
+
+        if not (n_1 if keep_ones else n_0):
+            # Every candidate shares this bit, so there is nothing to filter.
+            continue
+
+        kept = (value for value in values if ((value >> pos) & 1) == keep_ones)
+        values = array(values.typecode, kept) if isinstance(values, array) else list(kept)
+
+    return values[0]
+
+
+def calculate_2_streaming(fp):
+    '''Computes the life support rating from a compact array of diagnostics.
+
+    Reports are held in an `array` of the smallest unsigned type that fits
+    their width. Those wider than 64 bits fall back to a list.
+    '''
+    decoder = stream_diagnostics(fp)
+    width = next(decoder)
+
+    typecodes = [t for t in 'BHIQ' if array(t).itemsize * 8 >= width]
+    values = array(typecodes[0], decoder) if typecodes else list(decoder)
+
+    ox_gen_rating = filter_rating(values, width, most_common=True)
+    co2_scrub_rating = filter_rating(values, width, most_common=False)
+
+    return ox_gen_rating * co2_scrub_rating
+
+
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 198
     assert calculate_2(TEST_DATA) == 230
+    assert calculate_1_packed(TEST_DATA) == 198
+    assert calculate_1_streaming(TEST_DATA) == 198
+    assert calculate_2_streaming(TEST_DATA) == 230
+    assert calculate_2_sorted(TEST_DATA) == 230
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read().split('\n')
@@ -86,5 +268,13 @@ if __name__ == '__main__':
     answer_1 = calculate_1(data)
     answer_2 = calculate_2(data)
 
+    assert calculate_1_packed(data) == answer_1
+    assert calculate_2_sorted(data) == answer_2
+
+    with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
+        assert calculate_1_streaming(fp) == answer_1
+    with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
+        assert calculate_2_streaming(fp) == answer_2
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
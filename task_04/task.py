@@ -1,6 +1,11 @@
 import os
 import re
 
+from array import array
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
 __here__ = os.path.dirname(__file__)
 
 TEST_DATA = '''\
@@ -25,6 +30,8 @@ TEST_DATA = '''\
  2  0 12  3  7\
 '''
 
+Win = namedtuple('Win', ['turn', 'board', 'score'])
+
 def decode_input(data):
     # begin with splitting data by lines.
     lines = data.split('\n')
@@ -33,12 +40,15 @@ def decode_input(data):
     rand_numbers = lines.pop(0)
     yield [int(x) for x in rand_numbers.split(',')]
 
-    boards_coded = [line for line in lines if line]
+    boards_coded = [line for line in lines if line.strip()]
+    split_nums = lambda row: re.split(r'\s+', row.strip())
+    make_cells = lambda row: [[int(x), False] for x in row]
+
+    # Boards are square, so the width of a row tells us how many rows it has.
+    size = len(split_nums(boards_coded[0])) if boards_coded else 1
 
-    for i in range(len(boards_coded) // 5):
-        rows = boards_coded[i * 5:(i + 1) * 5]
-        split_nums = lambda row: re.split(r'\s+', row.strip())
-        make_cells = lambda row: [[int(x), False] for x in row]
+    for i in range(len(boards_coded) // size):
+        rows = boards_coded[i * size:(i + 1) * size]
 
         board = [make_cells(split_nums(row)) for row in rows]
         yield board
@@ -72,7 +82,8 @@ def sum_unmarked(board):
     return total
 
 
-def calculate_1(data):
+def calculate_1_scan(data):
+    '''Marks every board on each draw. Kept as a cross-check for `calculate_1`.'''
     decoder = decode_input(data)
     rands = next(decoder)
     boards = list(decoder)
@@ -88,7 +99,8 @@ def calculate_1(data):
                 return sum_unmarked(board) * num
 
 
-def calculate_2(data):
+def calculate_2_scan(data):
+    '''Marks every board on each draw. Kept as a cross-check for `calculate_2`.'''
     decoder = decode_input(data)
     rands = next(decoder)
     boards = list(decoder)
@@ -106,9 +118,229 @@ def calculate_2(data):
         boards = [board for board in boards if not is_winning(board)]
 
 
+def rank_winners(rands, boards):
+    '''Returns a Win for every board that wins, in the order they win.
+
+    Instead of scanning every board on every draw, we keep a reverse index from
+    each number to the cells holding it, along with per-board row and column
+    hit counters. Each draw then only touches the cells that have the number.
+    Boards winning on the same turn are ordered by their position in input.
+    '''
+    index = defaultdict(list)
+    for b, board in enumerate(boards):
+        for i, row in enumerate(board):
+            for j, (cell_num, _) in enumerate(row):
+                index[cell_num].append((b, i, j))
+
+    row_hits = [[0] * len(board) for board in boards]
+    col_hits = [[0] * len(board[0]) for board in boards]
+    unmarked = [sum_unmarked(board) for board in boards]
+    has_won = [False] * len(boards)
+    winners = []
+
+    for turn, num in enumerate(rands):
+        completed = set()
+
+        # Popping makes sure a number drawn twice is only marked once.
+        for b, i, j in index.pop(num, []):
+            if has_won[b]:
+                continue
+            unmarked[b] -= num
+            row_hits[b][i] += 1
+            col_hits[b][j] += 1
+            if row_hits[b][i] == len(col_hits[b]) or col_hits[b][j] == len(row_hits[b]):
+                completed.add(b)
+
+        for b in sorted(completed):
+            has_won[b] = True
+            winners.append(Win(turn, b, unmarked[b] * num))
+
+    return winners
+
+
+@lru_cache
+def win_masks(size, diagonals=False):
+    '''Returns the bitmasks of every winning line on a size x size board.
+
+    Cell (i, j) is stored at bit i * size + j.
+
+    >>> [bin(m) for m in win_masks(2, diagonals=True)]
+    ['0b11', '0b1100', '0b101', '0b1010', '0b1001', '0b110']
+    '''
+    rows = [((1 << size) - 1) << (i * size) for i in range(size)]
+    cols = [sum(1 << (i * size + j) for i in range(size)) for j in range(size)]
+    masks = rows + cols
+
+    if diagonals:
+        masks.append(sum(1 << (i * size + i) for i in range(size)))
+        masks.append(sum(1 << (i * size + size - 1 - i) for i in range(size)))
+
+    return tuple(masks)
+
+
+class BitBoard:
+    '''A bingo board whose marked cells are kept in a single integer.'''
+    __slots__ = ('size', 'cells', 'marked')
+
+    def __init__(self, board):
+        self.size = len(board)
+        self.marked = 0
+        # Numbers mapped to the bitmask of the cells having them.
+        self.cells = {}
+        for i, row in enumerate(board):
+            for j, (cell_num, state) in enumerate(row):
+                bit = 1 << (i * self.size + j)
+                self.cells[cell_num] = self.cells.get(cell_num, 0) | bit
+                if state:
+                    self.marked |= bit
+
+    def mark(self, num):
+        '''Marks the cells having num. Returns whether any new cell got marked.'''
+        new_cells = self.cells.get(num, 0) & ~self.marked
+        self.marked |= new_cells
+        return bool(new_cells)
+
+    def is_winning(self, masks):
+        return any(self.marked & mask == mask for mask in masks)
+
+    def sum_unmarked(self):
+        return sum(
+            cell_num * bin(mask & ~self.marked).count('1')
+            for cell_num, mask in self.cells.items()
+        )
+
+
+def play_bitboards(rands, boards, diagonals=False):
+    '''Same as `rank_winners`, but plays on BitBoards with configurable rules.'''
+    playing = list(enumerate(boards))
+    winners = []
+
+    for turn, num in enumerate(rands):
+        still_playing = []
+        for b, board in playing:
+            # A board can only start winning when the draw marks something.
+            if board.mark(num) and board.is_winning(win_masks(board.size, diagonals)):
+                winners.append(Win(turn, b, board.sum_unmarked() * num))
+            else:
+                still_playing.append((b, board))
+        playing = still_playing
+
+    return winners
+
+
+def calculate_bitboards(data, last=False, diagonals=False):
+    decoder = decode_input(data)
+    rands = next(decoder)
+    boards = [BitBoard(board) for board in decoder]
+    winners = play_bitboards(rands, boards, diagonals)
+    return winners[-1 if last else 0].score
+
+
+def pack_boards(boards):
+    '''Packs boards into a flat array of numbers, returned with the board size.
+
+    Boards are consumed one at a time, so a generator such as `decode_input`
+    never has more than one board decoded at once.
+    '''
+    cells = array('q')
+    size = 1
+    for b, board in enumerate(boards):
+        if not b:
+            size = len(board)
+        for row in board:
+            cells.extend(cell_num for cell_num, _ in row)
+    return cells, size
+
+
+def score_shard(rands, size, cells, offset=0):
+    '''Computes the Win of every board in a shard of packed boards.
+
+    Each cell is replaced with the turn its number is drawn. A line is complete
+    on the latest turn among its cells, and a board wins on the earliest turn
+    among its lines. Boards which never win are left out.
+    '''
+    never = len(rands)
+    draw_turns = {}
+    for turn, num in enumerate(rands):
+        draw_turns.setdefault(num, turn)
+
+    n_cells = size * size
+    turns = array('q', (draw_turns.get(cell_num, never) for cell_num in cells))
+    wins = []
+
+    for b in range(len(cells) // n_cells):
+        start = b * n_cells
+        board_turns = turns[start:start + n_cells]
+
+        row_turns = (max(board_turns[i * size:(i + 1) * size]) for i in range(size))
+        col_turns = (max(board_turns[j::size]) for j in range(size))
+        win_turn = min(min(row_turns), min(col_turns))
+
+        if win_turn == never:
+            continue
+
+        unmarked = sum(
+            cell_num
+            for cell_num, turn in zip(cells[start:start + n_cells], board_turns)
+            if turn > win_turn
+        )
+        wins.append(Win(win_turn, offset + b, unmarked * rands[win_turn]))
+
+    return wins
+
+
+def rank_winners_batch(data, processes=None, shard_size=4096):
+    '''Same as `rank_winners`, but scores shards of packed boards in a process pool.'''
+    decoder = decode_input(data)
+    rands = next(decoder)
+    cells, size = pack_boards(decoder)
+
+    n_boards = len(cells) // (size * size)
+    offsets = range(0, n_boards, shard_size)
+    shards = [cells[o * size * size:(o + shard_size) * size * size] for o in offsets]
+
+    with ProcessPoolExecutor(processes) as pool:
+        results = pool.map(
+            score_shard,
+            [rands] * len(shards),
+            [size] * len(shards),
+            shards,
+            offsets,
+        )
+        wins = [win for shard_wins in results for win in shard_wins]
+
+    return sorted(wins)
+
+
+def calculate_1(data):
+    decoder = decode_input(data)
+    rands = next(decoder)
+    winners = rank_winners(rands, list(decoder))
+    # Same as the scan, we get None when no board ever wins.
+    return winners[0].score if winners else None
+
+
+def calculate_2(data):
+    decoder = decode_input(data)
+    rands = next(decoder)
+    winners = rank_winners(rands, list(decoder))
+    return winners[-1].score if winners else None
+
+
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 4512
     assert calculate_2(TEST_DATA) == 1924
+    assert calculate_1_scan(TEST_DATA) == 4512
+    assert calculate_2_scan(TEST_DATA) == 1924
+
+    no_winner = '1,5\n\n1 2\n3 4'
+    assert calculate_1(no_winner) is None and calculate_1_scan(no_winner) is None
+    assert calculate_2(no_winner) is None and calculate_2_scan(no_winner) is None
+
+    assert calculate_bitboards(TEST_DATA) == 4512
+    assert calculate_bitboards(TEST_DATA, last=True) == 1924
+    assert rank_winners_batch(TEST_DATA, shard_size=2)[0].score == 4512
+    assert rank_winners_batch(TEST_DATA, shard_size=2)[-1].score == 1924
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read()
@@ -116,5 +348,14 @@ if __name__ == '__main__':
     answer_1 = calculate_1(data)
     answer_2 = calculate_2(data)
 
+    assert calculate_1_scan(data) == answer_1
+    assert calculate_2_scan(data) == answer_2
+    assert calculate_bitboards(data) == answer_1
+    assert calculate_bitboards(data, last=True) == answer_2
+
+    batch_winners = rank_winners_batch(data)
+    assert batch_winners[0].score == answer_1
+    assert batch_winners[-1].score == answer_2
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
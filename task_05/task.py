@@ -1,6 +1,9 @@
 import os
+import math
 
-from collections import Counter
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 __here__ = os.path.dirname(__file__)
 
@@ -83,6 +86,305 @@ def calculate(segments):
     return len(overlaps)
 
 
+# Increments a covered cell, saturating at 2 since we only care about overlaps.
+SATURATING_INCREMENT = bytes([1, 2] + [2] * 254)
+
+
+def bounding_box(segments):
+    '''Returns (x_min, y_min, x_max, y_max) over all segment endpoints.'''
+    xs = [x for start, end in segments for x in (start[0], end[0])]
+    ys = [y for start, end in segments for y in (start[1], end[1])]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def raster_slice(segment, origin, width):
+    '''Returns the slice of a row-major grid covered by a segment.
+
+    Horizontal, vertical, and diagonal segments all visit cells that are evenly
+    spaced in the flattened grid, so they map onto an (extended) slice.
+
+    >>> raster_slice([[0, 0], [2, 2]], (0, 0), 3)
+    slice(0, 9, 4)
+    '''
+    [x1, y1], [x2, y2] = segment
+    x_min, y_min = origin
+
+    dx = (x2 > x1) - (x2 < x1)
+    dy = (y2 > y1) - (y2 < y1)
+    n = max(abs(x2 - x1), abs(y2 - y1))
+
+    start = (y1 - y_min) * width + (x1 - x_min)
+    step = dy * width + dx
+
+    if step < 0:
+        start, step = start + step * n, -step
+    return slice(start, start + step * n + 1, step or 1)
+
+
+def calculate_grid(segments, max_cells=1 << 28):
+    '''Same as `calculate`, but accumulates coverage in a dense grid.
+
+    Grid is a bytearray over the bounding box of the segments, and every segment
+    is rasterised with one slice assignment. When the box has more than
+    `max_cells` cells, covered points are counted in a sparse dict instead.
+    '''
+    segments = list(segments)
+    if not segments:
+        return 0
+
+    x_min, y_min, x_max, y_max = bounding_box(segments)
+    width, height = x_max - x_min + 1, y_max - y_min + 1
+
+    if width * height > max_cells:
+        point_counts = Counter()
+        for segment in segments:
+            cells = raster_slice(segment, (x_min, y_min), width)
+            point_counts.update(range(cells.start, cells.stop, cells.step))
+        return len([p for p in point_counts.values() if p > 1])
+
+    grid = bytearray(width * height)
+    for segment in segments:
+        cells = raster_slice(segment, (x_min, y_min), width)
+        grid[cells] = grid[cells].translate(SATURATING_INCREMENT)
+
+    return grid.count(2)
+
+
+def clip_segment(segment, box):
+    '''Clips a segment to the closed box (x_min, y_min, x_max, y_max).
+
+    Returns None when the segment does not pass through the box.
+
+    >>> clip_segment([[0, 0], [9, 9]], (2, 0, 5, 3))
+    [[2, 2], [3, 3]]
+    '''
+    [x1, y1], [x2, y2] = segment
+    dx = (x2 > x1) - (x2 < x1)
+    dy = (y2 > y1) - (y2 < y1)
+    t_min, t_max = 0, max(abs(x2 - x1), abs(y2 - y1))
+
+    for start, step, lo, hi in ((x1, dx, box[0], box[2]), (y1, dy, box[1], box[3])):
+        if step == 0:
+            if not lo <= start <= hi:
+                return None
+            continue
+        # With a unit step the bounds on t are exact integers.
+        t_lo, t_hi = sorted(((lo - start) * step, (hi - start) * step))
+        t_min, t_max = max(t_min, t_lo), min(t_max, t_hi)
+
+    if t_min > t_max:
+        return None
+    return [[x1 + t_min * dx, y1 + t_min * dy], [x1 + t_max * dx, y1 + t_max * dy]]
+
+
+def segment_tiles(segment, tile_size):
+    '''Generates the tiles a segment passes through, with the clipped segment.
+
+    We go over the rows of tiles the segment spans, and only over the columns
+    that its clipped part in each row spans.
+    '''
+    [x1, y1], [x2, y2] = segment
+
+    for ty in range(min(y1, y2) // tile_size, max(y1, y2) // tile_size + 1):
+        band = (min(x1, x2), ty * tile_size, max(x1, x2), (ty + 1) * tile_size - 1)
+        in_band = clip_segment(segment, band)
+        if in_band is None:
+            continue
+
+        [bx1, _], [bx2, _] = in_band
+        for tx in range(min(bx1, bx2) // tile_size, max(bx1, bx2) // tile_size + 1):
+            tile = (tx * tile_size, band[1], (tx + 1) * tile_size - 1, band[3])
+            in_tile = clip_segment(in_band, tile)
+            if in_tile is not None:
+                yield (tx, ty), in_tile
+
+
+def rasterise_tile(origin, tile_size, segments):
+    '''Counts the overlaps within a single tile, using a tile sized grid.'''
+    grid = bytearray(tile_size * tile_size)
+    for segment in segments:
+        cells = raster_slice(segment, origin, tile_size)
+        grid[cells] = grid[cells].translate(SATURATING_INCREMENT)
+    return grid.count(2)
+
+
+def calculate_tiled(segments, tile_size=1024, processes=None):
+    '''Same as `calculate_grid`, but rasterises tiles of the plane in a process pool.
+
+    Segments are clipped to every tile they touch, so that each worker only ever
+    holds a tile_size x tile_size grid.
+    '''
+    tiles = defaultdict(list)
+    for segment in segments:
+        for key, clipped in segment_tiles(segment, tile_size):
+            tiles[key].append(clipped)
+
+    origins = [(tx * tile_size, ty * tile_size) for tx, ty in tiles]
+
+    with ProcessPoolExecutor(processes) as pool:
+        counts = pool.map(
+            rasterise_tile,
+            origins,
+            [tile_size] * len(tiles),
+            tiles.values(),
+        )
+        return sum(counts)
+
+
+# Every lattice line is a * x + b * y = c, for horizontal, vertical, diagonal,
+# and anti-diagonal directions.
+LINE_COEFFS = {'h': (0, 1), 'v': (1, 0), 'd': (-1, 1), 'a': (1, 1)}
+
+
+def line_direction(segment):
+    [x1, y1], [x2, y2] = segment
+    if x1 == x2:
+        return 'v'
+    if y1 == y2:
+        return 'h'
+    return 'd' if (x2 - x1) == (y2 - y1) else 'a'
+
+
+def line_param(direction, x, y):
+    '''Position of a point along its line. We use y for vertical lines, x otherwise.'''
+    return y if direction == 'v' else x
+
+
+def line_point(direction, c, t):
+    '''Inverse of `line_param` for the line with the given direction and c.'''
+    a, b = LINE_COEFFS[direction]
+    return (c, t) if direction == 'v' else (t, (c - a * t) // b)
+
+
+def in_intervals(intervals, t):
+    '''Checks if t lies in a sorted list of disjoint closed intervals.'''
+    i = bisect_right(intervals, (t, math.inf)) - 1
+    return i >= 0 and intervals[i][1] >= t
+
+
+def merge_intervals(intervals):
+    '''Sweeps over closed intervals on a line.
+
+    Returns the intervals covered at least once, and those covered at least
+    twice, both sorted and disjoint.
+
+    >>> merge_intervals([(0, 4), (2, 6), (8, 9)])
+    ([(0, 6), (8, 9)], [(2, 4)])
+    '''
+    events = sorted([(lo, 1) for lo, _ in intervals] + [(hi + 1, -1) for _, hi in intervals])
+    covered, doubled = [], []
+    depth = 0
+
+    for t, delta in events:
+        prev_depth, depth = depth, depth + delta
+        if prev_depth < 1 <= depth:
+            covered_start = t
+        elif depth < 1 <= prev_depth:
+            covered.append((covered_start, t - 1))
+        if prev_depth < 2 <= depth:
+            doubled_start = t
+        elif depth < 2 <= prev_depth:
+            doubled.append((doubled_start, t - 1))
+
+    return covered, doubled
+
+
+# Kinds of sweep events. At the same position, lines are inserted before
+# the queries and removed after them, since intervals are closed.
+INSERT, QUERY, REMOVE = 0, 1, 2
+
+
+def sweep_crossings(covered, dir_1, dir_2):
+    '''Generates the lattice points where covered intervals of two directions cross.
+
+    Every line is placed by its offsets in the two directions, (c_1, c_2). In
+    that plane an interval of `dir_1` has a fixed c_1 and spans a range of c_2,
+    while an interval of `dir_2` has a fixed c_2 and spans a range of c_1. So we
+    sweep over c_1, keeping the c_2 of the active `dir_2` intervals sorted, and
+    each `dir_1` interval only visits the active ones within its c_2 range,
+    which are exactly the ones crossing it.
+    '''
+    a_1, b_1 = LINE_COEFFS[dir_1]
+    a_2, b_2 = LINE_COEFFS[dir_2]
+    det = a_1 * b_2 - a_2 * b_1
+    events = []
+
+    for (direction, c), intervals in covered.items():
+        if direction not in (dir_1, dir_2):
+            continue
+        for lo, hi in intervals:
+            ends = (line_point(direction, c, lo), line_point(direction, c, hi))
+            if direction == dir_1:
+                c_2s = [a_2 * x + b_2 * y for x, y in ends]
+                events.append((c, QUERY, min(c_2s), max(c_2s)))
+            else:
+                c_1s = [a_1 * x + b_1 * y for x, y in ends]
+                events.append((min(c_1s), INSERT, c, c))
+                events.append((max(c_1s), REMOVE, c, c))
+
+    events.sort()
+    active = []
+
+    for c_1, kind, lo, hi in events:
+        if kind == INSERT:
+            insort(active, lo)
+        elif kind == REMOVE:
+            del active[bisect_left(active, lo)]
+        else:
+            for c_2 in active[bisect_left(active, lo):bisect_right(active, hi)]:
+                x, x_rem = divmod(c_1 * b_2 - c_2 * b_1, det)
+                y, y_rem = divmod(a_1 * c_2 - a_2 * c_1, det)
+                # Diagonals can cross between lattice points.
+                if not (x_rem or y_rem):
+                    yield x, y
+
+
+def calculate_sweep(segments):
+    '''Same as `calculate`, without visiting every covered point.
+
+    A point is covered more than once either when two collinear segments overlap
+    there, or when it is covered by lines in two different directions.
+
+    - Segments are grouped by the line they lie on, and each line is swept to get
+      the intervals covered at least once and at least twice. The latter are
+      counted directly by their length.
+    - For every pair of directions, a sweep finds the points where their
+      covered intervals cross, see `sweep_crossings`.
+    - Each crossing point is counted exactly once, even if it also lies in the
+      collinear overlaps of one or more lines.
+    '''
+    lines = defaultdict(list)
+    for segment in segments:
+        direction = line_direction(segment)
+        a, b = LINE_COEFFS[direction]
+        (x1, y1), (x2, y2) = segment
+        t1, t2 = line_param(direction, x1, y1), line_param(direction, x2, y2)
+        lines[direction, a * x1 + b * y1].append((min(t1, t2), max(t1, t2)))
+
+    covered, doubled = {}, {}
+    for key, intervals in lines.items():
+        covered[key], doubled[key] = merge_intervals(intervals)
+
+    overlaps = sum(hi - lo + 1 for intervals in doubled.values() for lo, hi in intervals)
+
+    crossings = set()
+    directions = list(LINE_COEFFS)
+    for i, dir_1 in enumerate(directions):
+        for dir_2 in directions[i + 1:]:
+            crossings.update(sweep_crossings(covered, dir_1, dir_2))
+
+    for x, y in crossings:
+        # Collinear overlaps were counted once for every line they are on, but
+        # a crossing point should only be counted once.
+        n_overlapping = sum(
+            in_intervals(doubled.get((d, a * x + b * y), []), line_param(d, x, y))
+            for d, (a, b) in LINE_COEFFS.items()
+        )
+        overlaps += 1 - n_overlapping
+
+    return overlaps
+
+
 def calculate_1(data):
     segments = decode_input(data)
     straight_segments = [c for c in segments if horizontal_or_vertical(c)]
@@ -97,6 +399,13 @@ def calculate_2(data):
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 5
     assert calculate_2(TEST_DATA) == 12
+    assert calculate_grid(filter(horizontal_or_vertical, decode_input(TEST_DATA))) == 5
+    assert calculate_grid(decode_input(TEST_DATA), max_cells=0) == 12
+    assert calculate_grid(decode_input(TEST_DATA)) == 12
+    assert calculate_sweep(filter(horizontal_or_vertical, decode_input(TEST_DATA))) == 5
+    assert calculate_sweep(decode_input(TEST_DATA)) == 12
+    assert calculate_tiled(filter(horizontal_or_vertical, decode_input(TEST_DATA)), 3) == 5
+    assert calculate_tiled(decode_input(TEST_DATA), 3) == 12
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read()
@@ -104,5 +413,12 @@ if __name__ == '__main__':
     answer_1 = calculate_1(data)
     answer_2 = calculate_2(data)
 
+    assert calculate_grid(filter(horizontal_or_vertical, decode_input(data))) == answer_1
+    assert calculate_grid(decode_input(data)) == answer_2
+    assert calculate_sweep(filter(horizontal_or_vertical, decode_input(data))) == answer_1
+    assert calculate_sweep(decode_input(data)) == answer_2
+    assert calculate_tiled(filter(horizontal_or_vertical, decode_input(data)), 256) == answer_1
+    assert calculate_tiled(decode_input(data), 256) == answer_2
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
@@ -1,4 +1,5 @@
 import os
+import json
 
 from collections import Counter
 
@@ -42,17 +43,127 @@ def calculate_2(data, days):
     return sum(state.values())
 
 
+def transition_matrix():
+    '''Returns the 9x9 matrix mapping timer counts of one day to the next.
+
+    Entry [i][j] is the number of fish with timer i produced by a fish with
+    timer j. Timer 0 becomes 6 and spawns an 8, every other timer decrements.
+    '''
+    matrix = [[0] * 9 for _ in range(9)]
+    for timer in range(1, 9):
+        matrix[timer - 1][timer] = 1
+    matrix[6][0] = 1
+    matrix[8][0] = 1
+    return matrix
+
+
+def mat_mul(lhs, rhs, mod=None):
+    product = [
+        [sum(a * b for a, b in zip(row, col)) for col in zip(*rhs)]
+        for row in lhs
+    ]
+    if mod is not None:
+        product = [[x % mod for x in row] for row in product]
+    return product
+
+
+def mat_pow(matrix, power, mod=None):
+    '''Raises a square matrix to a power by repeated squaring.'''
+    size = len(matrix)
+    result = [[int(i == j) for j in range(size)] for i in range(size)]
+
+    while power:
+        if power & 1:
+            result = mat_mul(result, matrix, mod)
+        matrix = mat_mul(matrix, matrix, mod)
+        power >>= 1
+
+    return result
+
+
+def calculate_2_matrix(data, days, mod=None):
+    '''Same as `calculate_2`, in O(log days) using the transition matrix.
+
+    If `mod` is given, the population is returned modulo `mod`, which keeps the
+    numbers small for astronomically large number of days.
+    '''
+    state = Counter(map(int, data.split(',')))
+    counts = [state[timer] for timer in range(9)]
+
+    matrix = mat_pow(transition_matrix(), days, mod)
+    total = sum(sum(row[j] * counts[j] for j in range(9)) for row in matrix)
+
+    return total if mod is None else total % mod
+
+
+class PopulationTable:
+    '''Caches the population after d days of a single fish, for every timer.
+
+    `rows[d][timer]` is the number of fish after `d` days starting from one fish
+    with the given timer. Any starting state is then just a dot product of its
+    timer counts with a row. Rows are computed lazily, up to `max_days` to keep
+    the cache bounded. Longer queries are handed over to `calculate_2_matrix`.
+    '''
+    def __init__(self, max_days=256, rows=None):
+        self.max_days = max_days
+        self.rows = (rows or [[1] * 9])[:max_days + 1]
+
+    def row(self, days):
+        while len(self.rows) <= days:
+            prev = self.rows[-1]
+            # A fish with timer 0 is a 6 and an 8 tomorrow. Others just decrement.
+            self.rows.append([prev[6] + prev[8]] + prev[:8])
+        return self.rows[days]
+
+    def query(self, data, days):
+        if days > self.max_days:
+            return calculate_2_matrix(data, days)
+        state = Counter(map(int, data.split(',')))
+        return sum(count * self.row(days)[timer] for timer, count in state.items())
+
+    def save(self, path):
+        with open(path, 'w') as fp:
+            json.dump({'max_days': self.max_days, 'rows': self.rows}, fp)
+
+    @classmethod
+    def load(cls, path, max_days=None):
+        '''Loads a saved table, or starts an empty one if nothing is saved yet.
+
+        The saved bound is kept, unless `max_days` is given explicitly.
+        '''
+        if not os.path.exists(path):
+            return cls() if max_days is None else cls(max_days)
+        with open(path, 'r') as fp:
+            saved = json.load(fp)
+        return cls(saved['max_days'] if max_days is None else max_days, saved['rows'])
+
+
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA, 18) == 26
     assert calculate_2(TEST_DATA, 18) == 26
     assert calculate_1(TEST_DATA, 80) == 5934
     assert calculate_2(TEST_DATA, 80) == 5934
     assert calculate_2(TEST_DATA, 256) == 26984457539
+    assert calculate_2_matrix(TEST_DATA, 18) == 26
+    assert calculate_2_matrix(TEST_DATA, 256) == 26984457539
+    assert calculate_2_matrix(TEST_DATA, 256, mod=10 ** 9 + 7) == 26984457539 % (10 ** 9 + 7)
+
+    table = PopulationTable(max_days=100)
+    assert table.query(TEST_DATA, 18) == 26
+    assert table.query(TEST_DATA, 80) == 5934
+    assert table.query(TEST_DATA, 256) == 26984457539
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read()
 
     answer_1 = calculate_2(data, 80)
     answer_2 = calculate_2(data, 256)
+
+    assert calculate_2_matrix(data, 80) == answer_1
+    assert calculate_2_matrix(data, 256) == answer_2
+
+    table = PopulationTable()
+    assert table.query(data, 80) == answer_1
+    assert table.query(data, 256) == answer_2
     print(f'{answer_1=}')
     print(f'{answer_2=}')
@@ -1,30 +1,290 @@
 import os
 
+from itertools import accumulate
+
 __here__ = os.path.dirname(__file__)
 
 TEST_DATA = '16,1,2,0,4,2,7,1,2,14'
 
+def linear_cost(distance):
+    return distance
+
+
+def triangular_cost(distance):
+    # Sum of the first `distance` natural numbers.
+    return (distance * (distance + 1)) // 2
+
+
+# Cost functions by the strategy number.
+COST_FUNCTIONS = [linear_cost, triangular_cost]
+
+
+def total_cost(hpos, target, cost):
+    return sum([cost(abs(pos - target)) for pos in hpos])
+
+
+def cost_curve(hpos, cost=linear_cost):
+    '''Returns (target, fuel) for every target from min(hpos) to max(hpos).
+
+    Works from a histogram of positions in O(n + range):
+    - Linear cost to the left of target t grows by the number of crabs at or
+      left of t - 1 when moving to t, and the same goes for the right side.
+    - Triangular cost is (d^2 + d) / 2, and the sum of d^2 follows from the
+      sums of positions and squared positions.
+
+    >>> cost_curve([0, 2])
+    [(0, 2), (1, 2), (2, 2)]
+    '''
+    if cost not in COST_FUNCTIONS:
+        raise ValueError('cost should be either linear_cost or triangular_cost.')
+
+    lo, hi = min(hpos), max(hpos)
+    n = len(hpos)
+
+    counts = [0] * (hi - lo + 1)
+    for pos in hpos:
+        counts[pos - lo] += 1
+    # Number of crabs at or left of each target.
+    n_left = list(accumulate(counts))
+
+    left = [0] * len(counts)
+    for i in range(1, len(counts)):
+        left[i] = left[i - 1] + n_left[i - 1]
+
+    right = [0] * len(counts)
+    for i in reversed(range(len(counts) - 1)):
+        right[i] = right[i + 1] + (n - n_left[i])
+
+    linear = [l + r for l, r in zip(left, right)]
+
+    if cost is linear_cost:
+        fuel = linear
+    else:
+        sum_pos = sum(hpos)
+        sum_sq = sum([pos * pos for pos in hpos])
+        squares = [
+            sum_sq - 2 * t * sum_pos + n * t * t
+            for t in range(lo, hi + 1)
+        ]
+        fuel = [(sq + d) // 2 for sq, d in zip(squares, linear)]
+
+    return list(zip(range(lo, hi + 1), fuel))
+
+
+def resolve_cost(strategy):
+    '''Returns the cost function for a strategy index, or the function itself.'''
+    if callable(strategy):
+        return strategy
+    if type(strategy) is int and 0 <= strategy < len(COST_FUNCTIONS):
+        return COST_FUNCTIONS[strategy]
+    raise ValueError('strategy should be either 0 or 1.')
+
+
 def calculate_1(data, strategy=0):
+    '''Tries every target. Strategy is either an index in COST_FUNCTIONS, or a
+    function giving the fuel cost of moving a crab by some distance.
+    '''
     hpos = list(map(int, data.split(',')))
-
-    def cost(target):
-        if strategy == 0:
-            mapper = lambda pos: abs(pos - target)
-        elif strategy == 1:
-            sum_first_n = lambda n: (n * (n - 1)) // 2
-            mapper = lambda pos: sum_first_n(abs(pos - target) + 1)
-        else:
-            raise ValueError('strategy should be either 0 or 1.')
-        return sum([mapper(pos) for pos in hpos])
+    cost = resolve_cost(strategy)
 
     extents = min(hpos), max(hpos)
-    costs = [(target, cost(target)) for target in range(*extents)]
+    if cost in COST_FUNCTIONS:
+        # Curve includes max(hpos), which was never a target here.
+        costs = cost_curve(hpos, cost)[:-1]
+    else:
+        costs = [(target, total_cost(hpos, target, cost)) for target in range(*extents)]
     return min(costs, key=lambda x: x[1])[1]
 
 
+def align_median(hpos):
+    '''With linear cost, the median minimizes the sum of absolute distances.'''
+    median = sorted(hpos)[len(hpos) // 2]
+    return median, total_cost(hpos, median, linear_cost)
+
+
+def align_mean(hpos):
+    '''With triangular cost, the optimum is within half a step from the mean.
+
+    Cost is (d^2 + |d|) / 2, so the derivative is off from that of the squared
+    distance by at most n / 2, which moves the optimum by at most 1/2. We check
+    the integers around the mean.
+    '''
+    mean = sum(hpos) // len(hpos)
+    candidates = range(mean - 1, mean + 3)
+    return min(
+        [(target, total_cost(hpos, target, triangular_cost)) for target in candidates],
+        key=lambda x: x[1],
+    )
+
+
+def align_convex(hpos, cost):
+    '''Ternary search for the best target, for any convex cost function.'''
+    lo, hi = min(hpos), max(hpos)
+
+    while hi - lo > 2:
+        third = (hi - lo) // 3
+        m1, m2 = lo + third, hi - third
+        if total_cost(hpos, m1, cost) <= total_cost(hpos, m2, cost):
+            hi = m2
+        else:
+            lo = m1
+
+    return min(
+        [(target, total_cost(hpos, target, cost)) for target in range(lo, hi + 1)],
+        key=lambda x: x[1],
+    )
+
+
+def calculate_2(data, strategy=0):
+    '''Finds the least fuel needed, without trying every target.
+
+    Strategy is the same as in `calculate_1`.
+    '''
+    hpos = list(map(int, data.split(',')))
+    cost = resolve_cost(strategy)
+
+    if cost is linear_cost:
+        _, fuel = align_median(hpos)
+    elif cost is triangular_cost:
+        _, fuel = align_mean(hpos)
+    else:
+        _, fuel = align_convex(hpos, cost)
+    return fuel
+
+
+class FenwickTree:
+    '''Binary indexed tree over positions 0..size-1, for prefix sums.'''
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, pos, delta):
+        if not 0 <= pos < self.size:
+            raise ValueError(f'position should be between 0 and {self.size - 1}.')
+        i = pos + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, pos):
+        '''Returns the sum over positions 0..pos.'''
+        total = 0
+        i = min(pos + 1, self.size)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def search(self, k):
+        '''Returns the smallest position whose prefix sum reaches k.'''
+        pos, step = 0, 1 << self.size.bit_length()
+        while step:
+            if pos + step <= self.size and self.tree[pos + step] < k:
+                pos += step
+                k -= self.tree[pos]
+            step >>= 1
+        return pos
+
+
+class CrabTracker:
+    '''Keeps the optimal target and its fuel as crabs come and go.
+
+    Counts and sums of positions are kept in Fenwick trees, so that the fuel for
+    any target is found in O(log range). After every update we find the median
+    (for linear cost) or check around the mean (for triangular cost), hence
+    the answer itself is always ready.
+    '''
+    def __init__(self, max_position, cost=linear_cost):
+        if cost not in COST_FUNCTIONS:
+            raise ValueError('cost should be either linear_cost or triangular_cost.')
+        self.cost = cost
+        self.max_position = max_position
+        self.counts = FenwickTree(max_position + 1)
+        self.sums = FenwickTree(max_position + 1)
+        self.n = 0
+        self.sum_pos = 0
+        self.sum_sq = 0
+        self.target = None
+        self.fuel = 0
+
+    def insert(self, pos):
+        self._check_position(pos)
+        self._update(pos, 1)
+
+    def remove(self, pos):
+        self._check_position(pos)
+        if self.counts.prefix(pos) - self.counts.prefix(pos - 1) == 0:
+            raise ValueError(f'no crab at position {pos} to remove.')
+        self._update(pos, -1)
+
+    def _check_position(self, pos):
+        if pos < 0 or pos > self.max_position:
+            raise ValueError(f'position should be between 0 and {self.max_position}.')
+
+    def _update(self, pos, sign):
+        self.counts.add(pos, sign)
+        self.sums.add(pos, sign * pos)
+        self.n += sign
+        self.sum_pos += sign * pos
+        self.sum_sq += sign * pos * pos
+        self.target, self.fuel = self._optimum()
+
+    def fuel_for(self, target):
+        n_left = self.counts.prefix(target)
+        sum_left = self.sums.prefix(target)
+        linear = (
+            target * n_left - sum_left
+            + (self.sum_pos - sum_left) - target * (self.n - n_left)
+        )
+        if self.cost is linear_cost:
+            return linear
+        squares = self.sum_sq - 2 * target * self.sum_pos + self.n * target * target
+        return (squares + linear) // 2
+
+    def _optimum(self):
+        if not self.n:
+            return None, 0
+
+        if self.cost is linear_cost:
+            median = self.counts.search(self.n // 2 + 1)
+            return median, self.fuel_for(median)
+
+        mean = self.sum_pos // self.n
+        candidates = range(max(mean - 1, 0), min(mean + 2, self.max_position) + 1)
+        return min(
+            [(target, self.fuel_for(target)) for target in candidates],
+            key=lambda x: x[1],
+        )
+
+
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 37
     assert calculate_1(TEST_DATA, 1) == 168
+    assert calculate_1(TEST_DATA, triangular_cost) == 168
+    assert calculate_2(TEST_DATA) == 37
+    assert cost_curve([16, 1, 2, 0, 4, 2, 7, 1, 2, 14])[2] == (2, 37)
+    assert cost_curve([16, 1, 2, 0, 4, 2, 7, 1, 2, 14], triangular_cost)[5] == (5, 168)
+    assert calculate_2(TEST_DATA, 1) == 168
+    assert calculate_2(TEST_DATA, triangular_cost) == 168
+    assert calculate_2(TEST_DATA, lambda d: d ** 2) == calculate_1(TEST_DATA, lambda d: d ** 2)
+
+    for cost, fuel in [(linear_cost, 37), (triangular_cost, 168)]:
+        tracker = CrabTracker(16, cost)
+        for pos in [16, 1, 2, 0, 4, 2, 7, 1, 2, 14, 3]:
+            tracker.insert(pos)
+        tracker.remove(3)
+        assert tracker.fuel == fuel
+
+    tracker = CrabTracker(10)
+    for bad_update in [lambda: tracker.insert(-1), lambda: tracker.insert(11),
+                       lambda: tracker.remove(5), lambda: tracker.remove(-1)]:
+        try:
+            bad_update()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('out of range update should raise ValueError.')
+    assert (tracker.n, tracker.target, tracker.fuel) == (0, None, 0)
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read()
@@ -32,5 +292,15 @@ if __name__ == '__main__':
     answer_1 = calculate_1(data)
     answer_2 = calculate_1(data, 1)
 
+    assert calculate_2(data) == answer_1
+    assert calculate_2(data, triangular_cost) == answer_2
+
+    hpos = list(map(int, data.split(',')))
+    for cost, answer in [(linear_cost, answer_1), (triangular_cost, answer_2)]:
+        tracker = CrabTracker(max(hpos), cost)
+        for pos in hpos:
+            tracker.insert(pos)
+        assert tracker.fuel == answer
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
@@ -1,5 +1,9 @@
 import os
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice, permutations
 
 __here__ = os.path.dirname(__file__)
 
@@ -30,11 +34,15 @@ SEGMENT_MAPPING = {
 }
 
 
+def decode_line(line):
+    signals, digits = line.split(' | ')
+    return (signals.split(' '), digits.split(' '))
+
+
 def decode_input(data):
     lines = data.split('\n')
     for line in lines:
-        signals, digits = line.split(' | ')
-        yield (signals.split(' '), digits.split(' '))
+        yield decode_line(line)
 
 
 def calculate_1(data):
@@ -144,9 +152,91 @@ def calculate_2(data):
     return output_sums
 
 
+def signal_mask(signal):
+    '''Encodes a signal as a 7-bit mask, with segment a as the lowest bit.
+
+    >>> bin(signal_mask('acf'))
+    '0b100101'
+    '''
+    mask = 0
+    for c in signal:
+        mask |= 1 << (ord(c) - ord('a'))
+    return mask
+
+
+@lru_cache(maxsize=None)
+def wiring_table():
+    '''Maps the signature of every one of the 5040 possible wirings to a decoder.
+
+    For a wiring, the signature is the sorted tuple of the masks of all ten
+    digits as they'd appear on the display, and the decoder maps each of
+    those masks to its digit.
+    '''
+    table = {}
+    for wires in permutations(range(7)):
+        decoder = {}
+        for number, segments in SEGMENT_MAPPING.items():
+            mask = 0
+            for seg in segments:
+                mask |= 1 << wires[ord(seg) - ord('a')]
+            decoder[mask] = number
+        table[tuple(sorted(decoder))] = decoder
+    return table
+
+
+def decode_entry(signals, digits):
+    '''Returns the output value of an entry by looking up its wiring.'''
+    decoder = wiring_table()[tuple(sorted(map(signal_mask, signals)))]
+    value = 0
+    for digit in digits:
+        value = value * 10 + decoder[signal_mask(digit)]
+    return value
+
+
+def calculate_2_table(data):
+    '''Same as `calculate_2`, but using the precomputed wiring_table.'''
+    return sum(decode_entry(signals, digits) for signals, digits in decode_input(data))
+
+
+def decode_chunk(lines):
+    return [decode_entry(*decode_line(line)) for line in lines]
+
+
+def decode_stream(fp, processes=None, chunk_size=65536):
+    '''Decodes note entries from a file object using a process pool.
+
+    Lines are read lazily and handed out in chunks. Only a few chunks per
+    worker are in flight at a time, so the file is never read entirely into
+    memory. Returns the output value of every entry, and their sum.
+    '''
+    lines = (line.strip() for line in fp)
+    lines = (line for line in lines if line)
+    values = []
+
+    with ProcessPoolExecutor(processes) as pool:
+        max_pending = 2 * (processes or os.cpu_count())
+        pending = deque()
+
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if chunk:
+                pending.append(pool.submit(decode_chunk, chunk))
+            if pending and (len(pending) >= max_pending or not chunk):
+                values.extend(pending.popleft().result())
+            elif not chunk:
+                break
+
+    return values, sum(values)
+
+
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 26
     assert calculate_2(TEST_DATA) == 61229
+    assert calculate_2_table(TEST_DATA) == 61229
+
+    test_values, test_sum = decode_stream(TEST_DATA.split('\n'), chunk_size=3)
+    assert test_values[:4] == [8394, 9781, 1197, 9361]
+    assert test_sum == 61229
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read()
@@ -154,5 +244,10 @@ if __name__ == '__main__':
     answer_1 = calculate_1(data)
     answer_2 = calculate_2(data)
 
+    assert calculate_2_table(data) == answer_2
+
+    with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
+        assert decode_stream(fp)[1] == answer_2
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
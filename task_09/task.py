@@ -1,6 +1,11 @@
 import os
+import mmap
 
+from array import array
+from collections import Counter
 from functools import reduce
+from itertools import compress
+from operator import lt
 
 
 __here__ = os.path.dirname(__file__)
@@ -61,6 +66,47 @@ def calculate_1(data):
     return risk_levels
 
 
+# Pads the rows of raw digits, compares higher than any digit.
+WALL = 0xff
+
+
+def decode_rows(data):
+    '''Returns the heightmap as rows of raw ASCII digits.
+
+    ASCII digits compare the same as the numbers, so there's no need to convert.
+    '''
+    return [line.encode('ascii') for line in data.split('\n')]
+
+
+def low_point_flags(rows):
+    '''Generates, for each row, a list telling which points are low points.
+
+    Instead of visiting the neighbors of each point, whole rows are compared
+    with their copies shifted left and right, and with the rows above and below.
+    The edges are padded with WALL.
+    '''
+    wall = bytes([WALL]) * len(rows[0])
+
+    for x, row in enumerate(rows):
+        padded = bytes([WALL]) + row + bytes([WALL])
+        up = rows[x - 1] if x else wall
+        down = rows[x + 1] if x + 1 < len(rows) else wall
+
+        neighborhood = map(min, padded, padded[2:], up, down)
+        yield list(map(lt, row, neighborhood))
+
+
+def calculate_1_rows(data):
+    '''Same as `calculate_1`, working on whole rows at once.'''
+    rows = decode_rows(data)
+    risk_levels = 0
+
+    for row, lows in zip(rows, low_point_flags(rows)):
+        # Risk level is the height + 1, and heights are offset by ord('0').
+        risk_levels += sum(compress(row, lows)) - (ord('0') - 1) * sum(lows)
+    return risk_levels
+
+
 def flood_fill(data, origin, shape):
     '''Returns an array filled with `10` starting from origin and bounded by `9`.
 
@@ -116,9 +162,169 @@ def calculate_2(data):
     return reduce(lambda x, y: x * y, top_3_basins, 1)
 
 
+def find_root(parents, i):
+    '''Finds the root of i in a union-find forest, halving the path on the way.'''
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def union(parents, i, j):
+    '''Joins the sets of i and j, keeping the smaller index as the root.'''
+    ri, rj = find_root(parents, i), find_root(parents, j)
+    if ri != rj:
+        parents[max(ri, rj)] = min(ri, rj)
+
+
+def label_basins(heights, shape):
+    '''Labels every point with the root of its basin, in a single pass.
+
+    Points are numbered row-major. Each point below `9` is joined with the
+    point above it and the one left to it, if those are below `9` as well.
+    Returns the union-find parents; points of height `9` are their own root.
+    '''
+    x_max, y_max = shape
+    parents = array('q', range(x_max * y_max))
+
+    for x in range(x_max):
+        row = heights[x]
+        prev_row = heights[x - 1] if x else None
+        for y in range(y_max):
+            if row[y] >= 9:
+                continue
+            i = x * y_max + y
+            if y and row[y - 1] < 9:
+                union(parents, i, i - 1)
+            if x and prev_row[y] < 9:
+                union(parents, i, i - y_max)
+
+    return parents
+
+
+def calculate_2_union_find(data):
+    '''Same as `calculate_2`, sizing all the basins at once without any copies.'''
+    heights = [row.translate(DIGIT_VALUES) for row in decode_rows(data)]
+    x_max, y_max = len(heights), len(heights[0])
+
+    parents = label_basins(heights, (x_max, y_max))
+    sizes = Counter(
+        find_root(parents, x * y_max + y)
+        for x in range(x_max)
+        for y in range(y_max)
+        if heights[x][y] < 9
+    )
+
+    basins = [
+        sizes[find_root(parents, x * y_max + y)]
+        for x, lows in enumerate(low_point_flags(heights))
+        for y in compress(range(y_max), lows)
+    ]
+    top_3_basins = sorted(basins)[-3:]
+
+    return reduce(lambda x, y: x * y, top_3_basins, 1)
+
+
+# Translates ASCII digits into their values.
+DIGIT_VALUES = bytes.maketrans(b'0123456789', bytes(range(10)))
+
+
+def calculate_banded(path, band_rows=1024):
+    '''Computes both answers for a memory-mapped heightmap, one band of rows at a time.
+
+    Each band is read along with a one-row halo above and below, so that its
+    low points can be found on their own. Basins are labelled within the band,
+    then merged with the basins still open from the band before, those which
+    touched its last row. A basin that does not reach the last row of the band
+    can't grow any further, so its size goes into the running top three and
+    its id is dropped. Only a band and the open basins are ever kept around.
+    '''
+    with open(path, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        width = mm.find(b'\n')
+        width = len(mm) if width == -1 else width
+        stride = width + 1
+        # Works with or without the newline at the end of the file.
+        n_rows = (len(mm) + 1) // stride
+
+        read_row = lambda x: mm[x * stride:x * stride + width].translate(DIGIT_VALUES)
+
+        # Size and number of low points of every open basin, by id.
+        open_sizes, open_lows = [], []
+        risk_levels = 0
+        top_3_basins = []
+        prev_labels = None
+
+        for start in range(0, n_rows, band_rows):
+            end = min(start + band_rows, n_rows)
+            halo_start = max(start - 1, 0)
+            rows = [read_row(x) for x in range(halo_start, min(end + 1, n_rows))]
+
+            offset = start - halo_start
+            band = rows[offset:offset + end - start]
+            flags = list(low_point_flags(rows))[offset:offset + end - start]
+
+            # Open basins keep their ids, the band's own basins come after them.
+            n_open = len(open_sizes)
+            parents = label_basins(band, (len(band), width))
+            basin_parents = dict(enumerate(range(n_open)))
+            sizes = Counter(dict(enumerate(open_sizes)))
+            lows = Counter(dict(enumerate(open_lows)))
+
+            def basin_of(x, y):
+                '''Id of the basin of a point in the band, or -1 for a `9`.'''
+                if band[x][y] >= 9:
+                    return -1
+                basin = n_open + find_root(parents, x * width + y)
+                basin_parents.setdefault(basin, basin)
+                return basin
+
+            for x, (row, row_lows) in enumerate(zip(band, flags)):
+                for y in range(width):
+                    if row[y] < 9:
+                        sizes[basin_of(x, y)] += 1
+                for y in compress(range(width), row_lows):
+                    risk_levels += row[y] + 1
+                    lows[basin_of(x, y)] += 1
+
+            if prev_labels is not None:
+                for y, prev_basin in enumerate(prev_labels):
+                    basin = basin_of(0, y)
+                    if prev_basin != -1 and basin != -1:
+                        union(basin_parents, prev_basin, basin)
+
+            merged_sizes, merged_lows = Counter(), Counter()
+            for basin, size in sizes.items():
+                root = find_root(basin_parents, basin)
+                merged_sizes[root] += size
+                merged_lows[root] += lows[basin]
+
+            last_roots = [basin_of(len(band) - 1, y) for y in range(width)]
+            last_roots = [-1 if b == -1 else find_root(basin_parents, b) for b in last_roots]
+            open_ids = {}
+            for root in last_roots:
+                if root != -1 and root not in open_ids:
+                    open_ids[root] = len(open_ids)
+
+            for root, size in merged_sizes.items():
+                if root not in open_ids:
+                    # Counted once per low point, as in `calculate_2`.
+                    top_3_basins = sorted(top_3_basins + [size] * min(merged_lows[root], 3))[-3:]
+
+            open_sizes = [merged_sizes[root] for root in open_ids]
+            open_lows = [merged_lows[root] for root in open_ids]
+            prev_labels = [open_ids.get(root, -1) for root in last_roots]
+
+    for size, n_lows in zip(open_sizes, open_lows):
+        top_3_basins = sorted(top_3_basins + [size] * min(n_lows, 3))[-3:]
+
+    return risk_levels, reduce(lambda x, y: x * y, top_3_basins, 1)
+
+
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 15
     assert calculate_2(TEST_DATA) == 1134
+    assert calculate_1_rows(TEST_DATA) == 15
+    assert calculate_2_union_find(TEST_DATA) == 1134
 
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read()
@@ -126,5 +332,12 @@ if __name__ == '__main__':
     answer_1 = calculate_1(data)
     answer_2 = calculate_2(data)
 
+    assert calculate_2_union_find(data) == answer_2
+    assert calculate_1_rows(data) == answer_1
+
+    input_path = os.path.join(__here__, 'input.txt')
+    assert calculate_banded(input_path) == (answer_1, answer_2)
+    assert calculate_banded(input_path, band_rows=7) == (answer_1, answer_2)
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')
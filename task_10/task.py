@@ -1,4 +1,9 @@
 import os
+import random
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 __here__ = os.path.dirname(__file__)
 
@@ -54,6 +59,16 @@ def is_corrupted(line):
     return False, c, stack
 
 
+def completion_score(stack):
+    # We can now take the stack and complete it in reverse.
+    completion = [PAIRS[s] for s in stack[::-1]]
+    score = 0
+    for c in completion:
+        score *= 5
+        score += AUTOCOMP_POINTS[c]
+    return score
+
+
 def calculate_1(data):
     lines = data.split('\n')
     score = 0
@@ -73,27 +88,94 @@ def calculate_2(data):
     for line in lines:
         corrupt, _, stack = is_corrupted(line)
         if not corrupt:
-            # We can now take the stack and complete it in reverse.
-            completion = [PAIRS[s] for s in stack[::-1]]
-            score = 0
-            for c in completion:
-                score *= 5
-                score += AUTOCOMP_POINTS[c]
-            scores.append(score)
+            scores.append(completion_score(stack))
 
     midpoint = len(scores) // 2
     return sorted(scores)[midpoint]
 
 
+def score_lines(lines):
+    '''Returns the syntax error score and the completion scores of some lines.'''
+    syntax_score = 0
+    scores = []
+
+    for line in lines:
+        corrupt, char, stack = is_corrupted(line)
+        if corrupt:
+            syntax_score += SYNTAX_POINTS[char]
+        else:
+            scores.append(completion_score(stack))
+    return syntax_score, scores
+
+
+def quickselect(values, k):
+    '''Returns the k-th smallest value, in expected O(n) time.
+
+    >>> quickselect([5, 1, 4, 2, 3], 2)
+    3
+    '''
+    values = list(values)
+
+    while True:
+        pivot = random.choice(values)
+        lows = [v for v in values if v < pivot]
+        n_pivots = values.count(pivot)
+
+        if k < len(lows):
+            values = lows
+        elif k < len(lows) + n_pivots:
+            return pivot
+        else:
+            k -= len(lows) + n_pivots
+            values = [v for v in values if v > pivot]
+
+
+def score_parallel(fp, processes=None, chunk_size=4096):
+    '''Scores chunks of lines from a file, or any iterable of lines, in a process pool.
+
+    Lines are read lazily, and at most two chunks per worker are in flight
+    at any time. Returns the syntax error score, the completion scores, and
+    the middle completion score.
+    '''
+    lines = (line.strip() for line in fp)
+    lines = (line for line in lines if line)
+
+    syntax_score = 0
+    scores = []
+
+    with ProcessPoolExecutor(processes) as pool:
+        max_pending = 2 * (processes or os.cpu_count())
+        pending = deque()
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if chunk:
+                pending.append(pool.submit(score_lines, chunk))
+            if pending and (len(pending) >= max_pending or not chunk):
+                chunk_syntax_score, chunk_scores = pending.popleft().result()
+                syntax_score += chunk_syntax_score
+                scores.extend(chunk_scores)
+            elif not chunk:
+                break
+
+    return syntax_score, scores, quickselect(scores, len(scores) // 2)
+
+
 if __name__ == '__main__':
     assert calculate_1(TEST_DATA) == 26397
     assert calculate_2(TEST_DATA) == 288957
 
+    syntax_score, _, middle_score = score_parallel(TEST_DATA.split('\n'), chunk_size=3)
+    assert (syntax_score, middle_score) == (26397, 288957)
+
     with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
         data = fp.read()
 
     answer_1 = calculate_1(data)
     answer_2 = calculate_2(data)
 
+    with open(os.path.join(__here__, 'input.txt'), 'r') as fp:
+        syntax_score, _, middle_score = score_parallel(fp)
+    assert (syntax_score, middle_score) == (answer_1, answer_2)
+
     print(f'{answer_1=}')
     print(f'{answer_2=}')